@@ -2,31 +2,109 @@ from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import asyncio
+import bisect
+import concurrent.futures
 import os
-import json
+import orjson
 import numpy as np
-import aiofiles
-import io
+import aiosqlite
+import tempfile
 from datetime import datetime
-import hashlib
+from blake3 import blake3
 import re
 from pathlib import Path
 from pypdf import PdfReader
 from docx import Document
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import simsimd
 from dotenv import load_dotenv
 
+# Optional appendable ANN index; searches fall back to the brute-force
+# SimSIMD scan when usearch is not installed
+try:
+    from usearch.index import Index as USearchIndex
+except ImportError:
+    USearchIndex = None
+
+# Optional Numba JIT, used to fuse the brute-force scan into one parallel
+# pass when usearch is absent
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Optional int8 ONNX Runtime encoder; falls back to the fp32 PyTorch
+# SentenceTransformer when optimum/onnxruntime are not installed
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
 # Load environment variables
 load_dotenv()
 
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "./models")
+
+class QuantizedEncoder:
+    """all-MiniLM-L6-v2 exported to ONNX and dynamically quantized to int8.
+
+    Mirrors the SentenceTransformer.encode() interface used by the API:
+    tokenize, run the ORT session, mean-pool, optionally L2-normalize.
+    """
+
+    def __init__(self):
+        quantized_dir = os.path.join(MODEL_CACHE_DIR, "minilm-int8")
+        if not os.path.exists(os.path.join(quantized_dir, "model_quantized.onnx")):
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                EMBEDDING_MODEL_NAME, export=True
+            )
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+            )
+        self.tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            quantized_dir, file_name="model_quantized.onnx"
+        )
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True,
+               normalize_embeddings=False, show_progress_bar=False):
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            inputs = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=256,
+                return_tensors="np"
+            )
+            hidden = np.asarray(self.model(**inputs).last_hidden_state)
+            # Mean-pool over non-padding tokens
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            embeddings.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        embeddings = np.vstack(embeddings).astype(np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            embeddings = embeddings / norms
+        return embeddings
+
 # Initialize the embedding model (will download on first use)
 embedding_model = None
 
 def get_embedding_model():
     global embedding_model
     if embedding_model is None:
-        embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        if ORTModelForFeatureExtraction is not None:
+            try:
+                embedding_model = QuantizedEncoder()
+            except Exception as e:
+                print(f"ONNX encoder unavailable, using SentenceTransformer: {e}")
+        if embedding_model is None:
+            embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
     return embedding_model
 
 # Configuration
@@ -35,11 +113,22 @@ STORAGE_DIR = os.getenv("STORAGE_DIR", "./storage")
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 120
 SIMILARITY_THRESHOLD = 0.45
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+# Embedding vectors are stored as append-only per-ingest shards listed in
+# manifest.json, so an ingest writes O(new chunks) instead of rewriting the
+# whole matrix
+EMBEDDINGS_SHARD_DIR = os.path.join(INDEX_DIR, "embeddings")
 
 # Ensure directories exist
 os.makedirs(INDEX_DIR, exist_ok=True)
+os.makedirs(EMBEDDINGS_SHARD_DIR, exist_ok=True)
 os.makedirs(STORAGE_DIR, exist_ok=True)
 
+# Text extraction is CPU-bound; run it in worker processes so multi-file
+# ingests parallelize across cores without blocking the event loop
+EXTRACT_EXECUTOR = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+
 app = FastAPI(title="GovPal API", version="1.0.0")
 
 # Add CORS middleware
@@ -98,60 +187,87 @@ class AnswerResponse(BaseModel):
     confidence: float
 
 # Utility functions
+def _last_boundary_before(positions: List[int], end: int) -> Optional[int]:
+    """Largest offset in a sorted boundary list strictly before end."""
+    idx = bisect.bisect_left(positions, end) - 1
+    return positions[idx] if idx >= 0 else None
+
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """Split text into overlapping chunks."""
     if len(text) <= chunk_size:
         return [text]
-    
+
+    # Precompute all boundary offsets in one pass each, then binary-search
+    # per window instead of rfind-scanning every chunk
+    period_offsets = [m.start() for m in re.finditer(r'\.', text)]
+    space_offsets = [m.start() for m in re.finditer(r' ', text)]
+
     chunks = []
     start = 0
+    min_break = chunk_size * 0.8
     while start < len(text):
         end = start + chunk_size
-        chunk = text[start:end]
-        
+
         # Try to break at a sentence or word boundary
         if end < len(text):
-            last_period = chunk.rfind('.')
-            last_space = chunk.rfind(' ')
-            if last_period > chunk_size * 0.8:
-                end = start + last_period + 1
-            elif last_space > chunk_size * 0.8:
-                end = start + last_space
-        
+            period = _last_boundary_before(period_offsets, end)
+            space = _last_boundary_before(space_offsets, end)
+            if period is not None and period - start > min_break:
+                end = period + 1
+            elif space is not None and space - start > min_break:
+                end = space
+
         chunks.append(text[start:end].strip())
         start = end - overlap
-        
+
         if start >= len(text):
             break
-    
+
     return chunks
 
+# Precompiled: runs over every ingested document. The group is
+# non-capturing so matches are full years, not '19'/'20' prefixes.
+_YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
+
 def extract_year_from_text(text: str) -> Optional[int]:
     """Extract likely year from document text."""
-    year_pattern = r'\b(19|20)\d{2}\b'
-    years = re.findall(year_pattern, text)
-    if years:
-        # Return the most recent year found
-        return max(int(year) for year in years)
-    return None
+    # Return the most recent year found
+    return max(
+        (int(m.group()) for m in _YEAR_PATTERN.finditer(text)),
+        default=None
+    )
+
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize embeddings into a C-contiguous float32 matrix."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+def _remove_quietly(path: str):
+    """Delete a temp file, ignoring races where it is already gone."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
 
 def generate_doc_id(filename: str, content_hash: str) -> str:
     """Generate unique document ID."""
-    return hashlib.md5(f"{filename}:{content_hash}".encode()).hexdigest()[:12]
+    return blake3(f"{filename}:{content_hash}".encode()).hexdigest()[:12]
 
-def extract_text_from_file(content: bytes, filename: str) -> str:
-    """Extract text from PDF or DOCX file."""
+def extract_text_from_file(file_path: str, filename: str) -> str:
+    """Extract text from a PDF or DOCX file on disk."""
     file_extension = filename.lower().split('.')[-1]
-    
+
     if file_extension == 'pdf':
-        pdf_reader = PdfReader(io.BytesIO(content))
+        pdf_reader = PdfReader(file_path)
         text = ""
         for page in pdf_reader.pages:
             text += page.extract_text() + "\n"
         return text
-    
+
     elif file_extension in ['docx', 'doc']:
-        doc = Document(io.BytesIO(content))
+        doc = Document(file_path)
         text = ""
         for paragraph in doc.paragraphs:
             text += paragraph.text + "\n"
@@ -168,168 +284,463 @@ def extract_text_from_file(content: bytes, filename: str) -> str:
     else:
         raise ValueError(f"Unsupported file type: {file_extension}")
 
-async def process_single_file(
-    file_content: bytes, 
-    filename: str, 
-    dept: Optional[str] = None,
-    year: Optional[int] = None,
-    tags: List[str] = None
-) -> FileIngestResult:
-    """Process a single file and return result."""
-    tags = tags or []
-    
+def extract_and_chunk(
+    file_path: str,
+    filename: str,
+    content_hash: str,
+    year: Optional[int] = None
+) -> Dict[str, Any]:
+    """CPU-bound phase of ingest: validate, extract text, and chunk.
+
+    Operates on the streamed temp file (the content hash is computed while
+    streaming), so the upload is never held in memory here. Returns
+    {"error": FileIngestResult} on failure, otherwise everything the persist
+    phase needs; does no encoding, so chunks can be embedded in one batch
+    across files.
+    """
     try:
-        # Check file type
         file_extension = filename.lower().split('.')[-1]
         if file_extension not in ['pdf', 'docx', 'doc']:
-            return FileIngestResult(
+            return {"error": FileIngestResult(
                 filename=filename,
                 status="skipped",
                 message=f"Unsupported file type: {file_extension}",
                 error_details="Only PDF and DOCX files are supported"
-            )
-        
-        # Extract text
-        text = extract_text_from_file(file_content, filename)
-        
+            )}
+
+        text = extract_text_from_file(file_path, filename)
+
         if not text.strip():
-            return FileIngestResult(
+            return {"error": FileIngestResult(
                 filename=filename,
                 status="error",
                 message="No text found in file",
                 error_details="File appears to be empty or unreadable"
-            )
-        
-        # Generate IDs and paths
-        content_hash = hashlib.md5(file_content).hexdigest()
+            )}
+
         doc_id = generate_doc_id(filename, content_hash)
-        
+
         # Extract year if not provided
         if not year:
             year = extract_year_from_text(text)
-        
-        # Save file to storage
-        file_path = os.path.join(STORAGE_DIR, f"{doc_id}_{filename}")
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_content)
-        
-        # Chunk the text
-        chunks = chunk_text(text)
-        
-        # Load existing index
-        index_data = await load_index()
-        
-        # Generate embeddings for chunks
-        model = get_embedding_model()
-        chunk_embeddings = model.encode(chunks)
-        
-        # Prepare new chunk and doc entries
-        chunk_entries = []
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{doc_id}_chunk_{i}"
-            chunk_entries.append({
-                "id": chunk_id,
-                "doc_id": doc_id,
-                "text": chunk,
-                "year": year,
-                "path": file_path,
-                "dept": dept,
-                "tags": tags
-            })
-        
-        doc_entry = {
-            "id": doc_id,
-            "title": filename,
-            "path": file_path,
+
+        return {
+            "filename": filename,
+            "doc_id": doc_id,
             "year": year,
-            "dept": dept,
-            "tags": tags,
-            "created_at": datetime.now().isoformat()
+            "chunks": chunk_text(text)
         }
-        
-        # Update index
-        if index_data["embeddings"] is not None:
-            new_embeddings = np.vstack([index_data["embeddings"], chunk_embeddings])
-        else:
-            new_embeddings = chunk_embeddings
-        
-        all_chunks = index_data["chunks"] + chunk_entries
-        all_docs = index_data["docs"] + [doc_entry]
-        
-        # Save updated index
-        await save_index(new_embeddings, all_chunks, all_docs)
-        
-        return FileIngestResult(
-            filename=filename,
-            document_id=doc_id,
-            chunks_created=len(chunks),
-            status="success",
-            message="File processed successfully"
-        )
-        
+
     except Exception as e:
-        return FileIngestResult(
+        return {"error": FileIngestResult(
             filename=filename,
             status="error",
             message=f"Error processing file: {str(e)}",
             error_details=str(e)
-        )
+        )}
+
+# Module-level cache so repeated searches reuse the loaded index instead of
+# re-reading it from disk; keyed on the mtime of manifest.json, which is
+# rewritten on every ingest
+_INDEX_CACHE = {"mtime": None, "data": None}
+
+def _manifest_path() -> str:
+    return os.path.join(INDEX_DIR, "manifest.json")
+
+def _read_manifest() -> List[str]:
+    """Ordered list of embedding shard filenames."""
+    if not os.path.exists(_manifest_path()):
+        return []
+    with open(_manifest_path(), 'rb') as f:
+        return orjson.loads(f.read())["shards"]
+
+def _write_manifest_sync(shards: List[str]):
+    tmp_path = _manifest_path() + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps({"shards": shards}))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, _manifest_path())
+
+def _migrate_flat_embeddings():
+    """One-time move of a legacy single embeddings.npy into shard zero."""
+    legacy_path = os.path.join(INDEX_DIR, "embeddings.npy")
+    if os.path.exists(_manifest_path()) or not os.path.exists(legacy_path):
+        return
+    shard = "00000000.npy"
+    os.replace(legacy_path, os.path.join(EMBEDDINGS_SHARD_DIR, shard))
+    _write_manifest_sync([shard])
+    print("Migrated embeddings.npy to the sharded layout")
 
 async def load_index() -> Dict[str, Any]:
-    """Load existing index data."""
+    """Load the embedding arrays plus chunk count, cached until unchanged.
+
+    Chunk and doc metadata stays in SQLite and is queried per request for
+    just the rows a search needs.
+    """
+    _migrate_flat_embeddings()
+    mtime = os.path.getmtime(_manifest_path()) if os.path.exists(_manifest_path()) else None
+    if mtime is not None and _INDEX_CACHE["mtime"] == mtime:
+        return _INDEX_CACHE["data"]
+
     index_data = {
         "embeddings": None,
-        "chunks": [],
-        "docs": []
+        "embeddings_norm": None,
+        "embeddings_f16": None,
+        "chunk_count": 0
     }
-    
+
     try:
-        # Load embeddings
-        embeddings_path = os.path.join(INDEX_DIR, "embeddings.npy")
-        if os.path.exists(embeddings_path):
-            index_data["embeddings"] = np.load(embeddings_path)
-        
-        # Load chunks
-        chunks_path = os.path.join(INDEX_DIR, "chunks.json")
-        if os.path.exists(chunks_path):
-            async with aiofiles.open(chunks_path, 'r') as f:
-                content = await f.read()
-                index_data["chunks"] = json.loads(content)
-        
-        # Load docs
-        docs_path = os.path.join(INDEX_DIR, "docs.json")
-        if os.path.exists(docs_path):
-            async with aiofiles.open(docs_path, 'r') as f:
-                content = await f.read()
-                index_data["docs"] = json.loads(content)
-    
+        # Load shards memory-mapped so the kernel page cache serves hot
+        # pages; the concatenated/derived views are rebuilt only when the
+        # manifest changes
+        shards = _read_manifest()
+        if shards:
+            arrays = [
+                np.load(os.path.join(EMBEDDINGS_SHARD_DIR, shard), mmap_mode='r')
+                for shard in shards
+            ]
+            index_data["embeddings"] = arrays[0] if len(arrays) == 1 else np.vstack(arrays)
+            # Pre-normalize once so searches can use a pure dot-product
+            # kernel, and keep a float16 copy for the half-bandwidth scan
+            index_data["embeddings_norm"] = normalize_embeddings(index_data["embeddings"])
+            index_data["embeddings_f16"] = np.ascontiguousarray(
+                index_data["embeddings_norm"], dtype=np.float16
+            )
+
+        db = await get_db()
+        cursor = await db.execute("SELECT COUNT(*) FROM chunks")
+        (index_data["chunk_count"],) = await cursor.fetchone()
+
     except Exception as e:
         print(f"Error loading index: {e}")
-    
+
+    _INDEX_CACHE["mtime"] = mtime
+    _INDEX_CACHE["data"] = index_data
     return index_data
 
-async def save_index(embeddings: np.ndarray, chunks: List[Dict], docs: List[Dict]):
-    """Save index data to files."""
+# Semantic cache for /search: a near-duplicate query (cosine >= 0.98 against
+# a cached query embedding, same filters) reuses the cached response instead
+# of re-running the scan. Invalidated whenever the index mtime changes.
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_MIN_SIM = 0.98
+_QUERY_CACHE = {"mtime": None, "embeddings": [], "filters": [], "responses": []}
+
+def _query_cache_lookup(
+    query_embedding: np.ndarray,
+    mtime,
+    dept: Optional[str],
+    limit: int
+) -> Optional[SearchResponse]:
+    """Return a cached response for a semantically equivalent query, if any."""
+    if _QUERY_CACHE["mtime"] != mtime:
+        _QUERY_CACHE["mtime"] = mtime
+        _QUERY_CACHE["embeddings"] = []
+        _QUERY_CACHE["filters"] = []
+        _QUERY_CACHE["responses"] = []
+        return None
+    if not _QUERY_CACHE["embeddings"]:
+        return None
+
+    cached = np.vstack(_QUERY_CACHE["embeddings"])
+    sims = 1.0 - np.asarray(simsimd.cdist(query_embedding, cached, metric="cosine"))[0]
+    for i, cached_filters in enumerate(_QUERY_CACHE["filters"]):
+        if cached_filters != (dept, limit):
+            sims[i] = -1.0
+
+    best = int(np.argmax(sims))
+    if sims[best] < QUERY_CACHE_MIN_SIM:
+        return None
+
+    # Move the hit to the back so eviction stays least-recently-used
+    for key in ("embeddings", "filters", "responses"):
+        _QUERY_CACHE[key].append(_QUERY_CACHE[key].pop(best))
+    return _QUERY_CACHE["responses"][-1]
+
+def _query_cache_store(
+    query_embedding: np.ndarray,
+    dept: Optional[str],
+    limit: int,
+    response: SearchResponse
+):
+    _QUERY_CACHE["embeddings"].append(query_embedding[0])
+    _QUERY_CACHE["filters"].append((dept, limit))
+    _QUERY_CACHE["responses"].append(response)
+    if len(_QUERY_CACHE["responses"]) > QUERY_CACHE_SIZE:
+        for key in ("embeddings", "filters", "responses"):
+            _QUERY_CACHE[key].pop(0)
+
+# Chunk/doc metadata lives in SQLite: inserts are O(new rows) and lookups
+# hit indexed columns instead of re-reading a JSON blob per request. The
+# `row` column mirrors the chunk's row in the embedding matrix.
+_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    doc_id TEXT,
+    text TEXT,
+    year INTEGER,
+    path TEXT,
+    dept TEXT,
+    tags TEXT
+);
+CREATE TABLE IF NOT EXISTS docs (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    path TEXT,
+    year INTEGER,
+    dept TEXT,
+    tags TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks(doc_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_dept ON chunks(dept);
+"""
+
+_DB_CACHE = {"conn": None}
+_DB_INIT_LOCK = asyncio.Lock()
+
+async def get_db() -> aiosqlite.Connection:
+    """Open (once) the metadata database, migrating any legacy JSON index."""
+    if _DB_CACHE["conn"] is None:
+        # The init awaits several times, so concurrent first requests must
+        # serialize here (and re-check) or they each connect and migrate
+        async with _DB_INIT_LOCK:
+            if _DB_CACHE["conn"] is None:
+                conn = await aiosqlite.connect(os.path.join(INDEX_DIR, "index.db"))
+                try:
+                    conn.row_factory = aiosqlite.Row
+                    await conn.executescript(_DB_SCHEMA)
+                    await conn.commit()
+                    await _migrate_json_index(conn)
+                except Exception:
+                    await conn.close()
+                    raise
+                _DB_CACHE["conn"] = conn
+    return _DB_CACHE["conn"]
+
+async def _migrate_json_index(conn: aiosqlite.Connection):
+    """One-time import of the pre-SQLite chunks.json/docs.json files."""
+    cursor = await conn.execute("SELECT COUNT(*) FROM chunks")
+    (count,) = await cursor.fetchone()
+    chunks_path = os.path.join(INDEX_DIR, "chunks.json")
+    if count or not os.path.exists(chunks_path):
+        return
+
+    with open(chunks_path, 'rb') as f:
+        chunks = orjson.loads(f.read())
+    docs = []
+    docs_path = os.path.join(INDEX_DIR, "docs.json")
+    if os.path.exists(docs_path):
+        with open(docs_path, 'rb') as f:
+            docs = orjson.loads(f.read())
+
+    await _insert_entries(conn, chunks, docs, start_row=0)
+    print(f"Migrated {len(chunks)} chunks and {len(docs)} docs from JSON to SQLite")
+
+async def _insert_entries(
+    conn: aiosqlite.Connection,
+    chunk_entries: List[Dict],
+    doc_entries: List[Dict],
+    start_row: int
+):
+    """Insert new chunk/doc metadata starting at the given embedding row.
+
+    Chunk inserts are plain INSERTs on purpose: an id or row collision must
+    fail loudly rather than OR-REPLACE away a row the embedding matrix still
+    points at (re-uploads are skipped before reaching this point).
+    """
+    await conn.executemany(
+        "INSERT INTO chunks (row, id, doc_id, text, year, path, dept, tags) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (start_row + i, c["id"], c["doc_id"], c["text"], c["year"],
+             c["path"], c["dept"], orjson.dumps(c["tags"]).decode())
+            for i, c in enumerate(chunk_entries)
+        ]
+    )
+    await conn.executemany(
+        "INSERT OR REPLACE INTO docs (id, title, path, year, dept, tags, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (d["id"], d["title"], d["path"], d["year"], d["dept"],
+             orjson.dumps(d["tags"]).decode(), d["created_at"])
+            for d in doc_entries
+        ]
+    )
+    await conn.commit()
+
+# The byYear/byDept facet counts only change when the index does, so they
+# are recomputed at most once per ingest rather than per search
+_AGGREGATES_CACHE = {"mtime": None, "aggregates": None}
+
+async def get_aggregates(db: aiosqlite.Connection) -> Dict[str, Dict]:
+    """Facet counts for search responses, cached against the index mtime."""
+    mtime = _INDEX_CACHE["mtime"]
+    if _AGGREGATES_CACHE["mtime"] == mtime and _AGGREGATES_CACHE["aggregates"] is not None:
+        return _AGGREGATES_CACHE["aggregates"]
+
+    aggregates = {"byYear": {}, "byDept": {}}
+
+    cursor = await db.execute(
+        "SELECT year, COUNT(*) AS n FROM chunks WHERE year IS NOT NULL GROUP BY year"
+    )
+    for r in await cursor.fetchall():
+        aggregates["byYear"][str(r["year"])] = r["n"]
+
+    cursor = await db.execute(
+        "SELECT dept, COUNT(*) AS n FROM chunks WHERE dept IS NOT NULL GROUP BY dept"
+    )
+    for r in await cursor.fetchall():
+        aggregates["byDept"][r["dept"]] = r["n"]
+
+    _AGGREGATES_CACHE["mtime"] = mtime
+    _AGGREGATES_CACHE["aggregates"] = aggregates
+    return aggregates
+
+def _chunk_from_row(row: aiosqlite.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "doc_id": row["doc_id"],
+        "text": row["text"],
+        "year": row["year"],
+        "path": row["path"],
+        "dept": row["dept"],
+        "tags": orjson.loads(row["tags"]) if row["tags"] else []
+    }
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _topk_cosine_kernel(query, emb, threshold, k):
+        """Fused dot-product + threshold + top-K over normalized vectors.
+
+        Streams the matrix once with per-block top-K buffers, so neither the
+        full similarity vector nor sort temporaries are materialized.
+        """
+        n, dim = emb.shape
+        nblocks = 32
+        block = (n + nblocks - 1) // nblocks
+        block_scores = np.full((nblocks, k), -2.0, dtype=np.float32)
+        block_rows = np.full((nblocks, k), -1, dtype=np.int64)
+
+        for b in prange(nblocks):
+            lo = b * block
+            hi = lo + block
+            if hi > n:
+                hi = n
+            for i in range(lo, hi):
+                score = 0.0
+                for j in range(dim):
+                    score += query[j] * emb[i, j]
+                if score < threshold or score <= block_scores[b, k - 1]:
+                    continue
+                # Insertion into this block's descending top-K buffer
+                pos = k - 1
+                while pos > 0 and block_scores[b, pos - 1] < score:
+                    block_scores[b, pos] = block_scores[b, pos - 1]
+                    block_rows[b, pos] = block_rows[b, pos - 1]
+                    pos -= 1
+                block_scores[b, pos] = score
+                block_rows[b, pos] = i
+
+        # Merge the per-block buffers
+        flat_scores = block_scores.reshape(nblocks * k)
+        flat_rows = block_rows.reshape(nblocks * k)
+        order = np.argsort(-flat_scores)
+        out_rows = np.empty(k, dtype=np.int64)
+        out_scores = np.empty(k, dtype=np.float32)
+        found = 0
+        for o in order:
+            if found >= k or flat_rows[o] < 0:
+                break
+            out_rows[found] = flat_rows[o]
+            out_scores[found] = flat_scores[o]
+            found += 1
+        return out_rows[:found], out_scores[:found]
+else:
+    _topk_cosine_kernel = None
+
+_ANN_CACHE = {"index": None}
+
+def _ann_index_path() -> str:
+    return os.path.join(INDEX_DIR, "index.usearch")
+
+def _get_ann_index():
+    """Load (or reuse) the appendable usearch index, if usearch is installed."""
+    if USearchIndex is None:
+        return None
+    if _ANN_CACHE["index"] is None:
+        index = USearchIndex(ndim=EMBEDDING_DIM, metric="cos", dtype="f32")
+        path = _ann_index_path()
+        if os.path.exists(path):
+            index.load(path)
+        _ANN_CACHE["index"] = index
+    return _ANN_CACHE["index"]
+
+def _save_array_atomic(path: str, array: np.ndarray):
+    """Write a .npy file atomically so in-flight mmap readers stay valid."""
+    tmp_path = f"{path}.tmp.npy"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _append_embeddings_sync(new_embeddings: np.ndarray, start_row: int):
+    """Append one ingest batch as a new shard and publish it in the manifest.
+
+    Shards are stored as float16 - half the disk and load bandwidth of f32,
+    with retrieval accuracy within noise for MiniLM cosine - and the write
+    is O(new chunks) regardless of index size.
+    """
+    shards = _read_manifest()
+    shard = f"{start_row:08d}.npy"
+    if shard in shards:
+        # A published shard already covers these rows; overwriting it would
+        # orphan the documents it backs. start_row is derived from the
+        # loaded matrix, so this only fires on real index corruption.
+        raise RuntimeError(f"Embedding shard {shard} already published; refusing to overwrite")
+    _save_array_atomic(
+        os.path.join(EMBEDDINGS_SHARD_DIR, shard),
+        np.ascontiguousarray(new_embeddings, dtype=np.float16)
+    )
+    shards.append(shard)
+
+    # Write the manifest last: its mtime keys the index cache
+    _write_manifest_sync(shards)
+
+async def save_index(new_embeddings: np.ndarray, start_row: int):
+    """Append the batch's embedding shard without blocking the event loop."""
     try:
-        # Save embeddings
-        embeddings_path = os.path.join(INDEX_DIR, "embeddings.npy")
-        np.save(embeddings_path, embeddings)
-        
-        # Save chunks
-        chunks_path = os.path.join(INDEX_DIR, "chunks.json")
-        async with aiofiles.open(chunks_path, 'w') as f:
-            await f.write(json.dumps(chunks, indent=2))
-        
-        # Save docs
-        docs_path = os.path.join(INDEX_DIR, "docs.json")
-        async with aiofiles.open(docs_path, 'w') as f:
-            await f.write(json.dumps(docs, indent=2))
-    
+        await asyncio.get_running_loop().run_in_executor(
+            None, _append_embeddings_sync, new_embeddings, start_row
+        )
     except Exception as e:
         print(f"Error saving index: {e}")
         raise
 
 
+@app.on_event("startup")
+async def warm_embedding_model():
+    """Load and warm the embedding model so the first request doesn't pay
+    for model download, checkpoint init, and kernel warmup."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, get_embedding_model)
+    await loop.run_in_executor(None, lambda: get_embedding_model().encode(["warmup"]))
+
+
+@app.on_event("shutdown")
+async def close_resources():
+    """Close the metadata database and the extraction pool on shutdown.
+
+    aiosqlite connections run on non-daemon worker threads, so leaving one
+    open keeps the interpreter alive and wedges graceful stops."""
+    if _DB_CACHE["conn"] is not None:
+        await _DB_CACHE["conn"].close()
+        _DB_CACHE["conn"] = None
+    EXTRACT_EXECUTOR.shutdown(wait=False)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -358,54 +769,209 @@ async def ingest_documents(
     if tags:
         tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
     
-    results = []
-    files_successful = 0
-    files_failed = 0
-    total_chunks = 0
-    
-    for file in files:
+    results: List[Optional[FileIngestResult]] = [None] * len(files)
+    pending = []  # (result slot, temp path, extraction output)
+
+    # Stream each upload to a temp file, hashing incrementally, so peak
+    # memory stays at one read buffer per file instead of the full upload
+    read_files = []  # (result slot, filename, temp path, content hash)
+    for i, file in enumerate(files):
         if not file.filename:
-            result = FileIngestResult(
+            results[i] = FileIngestResult(
                 filename="unknown",
                 status="error",
                 message="File has no filename",
                 error_details="Cannot process file without filename"
             )
-            results.append(result)
-            files_failed += 1
             continue
-        
+
+        tmp_path = None
         try:
-            # Read file content
-            content = await file.read()
-            
-            # Process the file
-            result = await process_single_file(
-                file_content=content,
-                filename=file.filename,
-                dept=dept,
-                year=year,
-                tags=tag_list
-            )
-            
-            results.append(result)
-            
-            if result.status == "success":
-                files_successful += 1
-                total_chunks += result.chunks_created
-            else:
-                files_failed += 1
-                
+            hasher = blake3()
+            with tempfile.NamedTemporaryFile(dir=STORAGE_DIR, suffix=".upload", delete=False) as tmp:
+                tmp_path = tmp.name
+                while True:
+                    piece = await file.read(1 << 20)
+                    if not piece:
+                        break
+                    hasher.update(piece)
+                    tmp.write(piece)
+            read_files.append((i, file.filename, tmp_path, hasher.hexdigest()))
         except Exception as e:
-            result = FileIngestResult(
+            # A failed read (client disconnect, bad multipart) only fails
+            # this file, not the whole batch
+            if tmp_path:
+                _remove_quietly(tmp_path)
+            results[i] = FileIngestResult(
                 filename=file.filename,
                 status="error",
                 message=f"Unexpected error: {str(e)}",
                 error_details=str(e)
             )
-            results.append(result)
-            files_failed += 1
-    
+
+    # Phase 1: extract and chunk all files concurrently in worker processes
+    loop = asyncio.get_running_loop()
+    extractions = await asyncio.gather(
+        *[
+            loop.run_in_executor(
+                EXTRACT_EXECUTOR, extract_and_chunk, tmp_path, filename, content_hash, year
+            )
+            for _, filename, tmp_path, content_hash in read_files
+        ],
+        return_exceptions=True
+    )
+
+    for (i, filename, tmp_path, _), extracted in zip(read_files, extractions):
+        if isinstance(extracted, Exception):
+            results[i] = FileIngestResult(
+                filename=filename,
+                status="error",
+                message=f"Unexpected error: {str(extracted)}",
+                error_details=str(extracted)
+            )
+        elif "error" in extracted:
+            results[i] = extracted["error"]
+        else:
+            pending.append((i, tmp_path, extracted))
+            continue
+        _remove_quietly(tmp_path)
+
+    # Phase 2: embed every file's chunks in one batched forward pass, then
+    # persist the whole upload with a single index update
+    if pending:
+        moved = {}  # result slot -> final storage path
+        try:
+            # Skip documents that are already indexed (re-uploads): replacing
+            # their metadata rows would delete them out from under the
+            # embedding matrix and break the row alignment
+            db = await get_db()
+            placeholders = ",".join("?" * len(pending))
+            cursor = await db.execute(
+                f"SELECT id FROM docs WHERE id IN ({placeholders})",
+                [extracted["doc_id"] for _, _, extracted in pending]
+            )
+            known_doc_ids = {r["id"] for r in await cursor.fetchall()}
+
+            remaining = []
+            for i, tmp_path, extracted in pending:
+                if extracted["doc_id"] in known_doc_ids:
+                    _remove_quietly(tmp_path)
+                    results[i] = FileIngestResult(
+                        filename=extracted["filename"],
+                        document_id=extracted["doc_id"],
+                        status="skipped",
+                        message="Document already ingested",
+                        error_details="A document with identical content and filename is already indexed"
+                    )
+                else:
+                    known_doc_ids.add(extracted["doc_id"])
+                    remaining.append((i, tmp_path, extracted))
+            pending = remaining
+
+            if pending:
+                all_texts = [c for _, _, extracted in pending for c in extracted["chunks"]]
+                model = get_embedding_model()
+                all_embeddings = model.encode(
+                    all_texts,
+                    batch_size=64,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+
+                index_data = await load_index()
+                # New rows start where the embedding matrix actually ends -
+                # the matrix, not the metadata count, is the source of truth
+                # for row numbering
+                existing = (
+                    index_data["embeddings"].shape[0]
+                    if index_data["embeddings"] is not None else 0
+                )
+
+                chunk_entries = []
+                doc_entries = []
+                for i, tmp_path, extracted in pending:
+                    doc_id = extracted["doc_id"]
+                    file_year = extracted["year"]
+                    chunks = extracted["chunks"]
+
+                    # Move the streamed temp file into storage (same filesystem,
+                    # so this is a rename rather than a copy)
+                    file_path = os.path.join(STORAGE_DIR, f"{doc_id}_{extracted['filename']}")
+                    os.replace(tmp_path, file_path)
+                    moved[i] = file_path
+
+                    for j, chunk in enumerate(chunks):
+                        chunk_entries.append({
+                            "id": f"{doc_id}_chunk_{j}",
+                            "doc_id": doc_id,
+                            "text": chunk,
+                            "year": file_year,
+                            "path": file_path,
+                            "dept": dept,
+                            "tags": tag_list
+                        })
+
+                    doc_entries.append({
+                        "id": doc_id,
+                        "title": extracted["filename"],
+                        "path": file_path,
+                        "year": file_year,
+                        "dept": dept,
+                        "tags": tag_list,
+                        "created_at": datetime.now().isoformat()
+                    })
+
+                    results[i] = FileIngestResult(
+                        filename=extracted["filename"],
+                        document_id=doc_id,
+                        chunks_created=len(chunks),
+                        status="success",
+                        message="File processed successfully"
+                    )
+
+                # Append only the new vectors to the ANN index - O(log N)
+                # inserts instead of restructuring the whole index - keyed by
+                # matrix row so a rebuild recovers from any divergence
+                ann_index = _get_ann_index()
+                if ann_index is not None:
+                    if len(ann_index) != existing:
+                        # Rebuild once for indexes that predate the ANN file
+                        # or fell out of sync with the matrix
+                        ann_index.reset()
+                        if existing:
+                            ann_index.add(np.arange(existing), index_data["embeddings_norm"])
+                    ann_index.add(
+                        np.arange(existing, existing + len(all_texts)),
+                        normalize_embeddings(all_embeddings)
+                    )
+                    ann_index.save(_ann_index_path())
+
+                # Append this batch's vectors as a new shard BEFORE the
+                # metadata commit: a crash in between leaves an unreferenced
+                # shard region (harmless, skipped at search) rather than
+                # metadata rows pointing at vectors that were never written
+                await save_index(all_embeddings, start_row=existing)
+
+                # Metadata inserts are O(new rows)
+                await _insert_entries(await get_db(), chunk_entries, doc_entries, start_row=existing)
+
+        except Exception as e:
+            for i, tmp_path, extracted in pending:
+                # Remove whichever copy this file got to: the temp file, or
+                # the storage file if it was already moved into place
+                _remove_quietly(moved[i] if i in moved else tmp_path)
+                results[i] = FileIngestResult(
+                    filename=extracted["filename"],
+                    status="error",
+                    message=f"Error processing file: {str(e)}",
+                    error_details=str(e)
+                )
+
+    files_successful = sum(1 for r in results if r.status == "success")
+    files_failed = len(results) - files_successful
+    total_chunks = sum(r.chunks_created for r in results)
+
     # Generate summary message
     if files_successful == len(files):
         message = f"All {len(files)} files processed successfully"
@@ -435,8 +1001,8 @@ async def search_documents(
     try:
         # Load index
         index_data = await load_index()
-        
-        if not index_data["chunks"] or index_data["embeddings"] is None:
+
+        if index_data["chunk_count"] == 0 or index_data["embeddings"] is None:
             return SearchResponse(
                 query=q,
                 results=[],
@@ -447,27 +1013,74 @@ async def search_documents(
         
         # Generate query embedding
         model = get_embedding_model()
-        query_embedding = model.encode([q])
-        
-        # Calculate similarities
-        similarities = cosine_similarity(query_embedding, index_data["embeddings"])[0]
-        
-        # Get top chunks with similarity above threshold
-        chunk_scores = list(enumerate(similarities))
-        chunk_scores.sort(key=lambda x: x[1], reverse=True)
+        query_embedding = normalize_embeddings(model.encode([q]))
+
+        # Semantic cache: near-identical recent queries skip the scan
+        cached_response = _query_cache_lookup(query_embedding, _INDEX_CACHE["mtime"], dept, limit)
+        if cached_response is not None:
+            return cached_response
+
+        total_chunks = index_data["chunk_count"]
+        ann_index = _get_ann_index()
+        if ann_index is not None and len(ann_index) == total_chunks:
+            # ANN lookup over the appendable index
+            matches = ann_index.search(query_embedding[0], min(50, total_chunks))
+            chunk_scores = [
+                (int(key), 1.0 - float(dist))
+                for key, dist in zip(matches.keys, matches.distances)
+            ]
+        elif _topk_cosine_kernel is not None:
+            # Fused brute-force scan: dot + threshold + top-K in one
+            # parallel pass over the normalized matrix
+            top_rows, top_scores = _topk_cosine_kernel(
+                query_embedding[0],
+                index_data["embeddings_norm"],
+                SIMILARITY_THRESHOLD,
+                min(50, total_chunks)
+            )
+            chunk_scores = [
+                (int(row), float(score)) for row, score in zip(top_rows, top_scores)
+            ]
+        else:
+            # Brute-force scan via SimSIMD's float16 cosine kernel - half
+            # the bytes moved of f32 with retrieval accuracy within noise
+            similarities = 1.0 - np.asarray(
+                simsimd.cdist(
+                    query_embedding.astype(np.float16),
+                    index_data["embeddings_f16"],
+                    metric="cosine"
+                )
+            )[0]
+            # O(N) top-K selection in C instead of sorting all N scores
+            k = min(50, similarities.shape[0])
+            top_idx = np.argpartition(similarities, -k)[-k:]
+            top_idx = top_idx[np.argsort(-similarities[top_idx])]
+            chunk_scores = [(int(i), float(similarities[i])) for i in top_idx]
         
-        # Filter by similarity threshold and department
+        # Take top 50 above the similarity threshold and fetch just those rows
+        top_candidates = [
+            (chunk_idx, score) for chunk_idx, score in chunk_scores[:50]
+            if score >= SIMILARITY_THRESHOLD
+        ]
+
+        db = await get_db()
+        chunk_rows = {}
+        if top_candidates:
+            placeholders = ",".join("?" * len(top_candidates))
+            cursor = await db.execute(
+                f"SELECT * FROM chunks WHERE row IN ({placeholders})",
+                [chunk_idx for chunk_idx, _ in top_candidates]
+            )
+            chunk_rows = {r["row"]: _chunk_from_row(r) for r in await cursor.fetchall()}
+
+        # Filter by department if specified
         filtered_chunks = []
-        for chunk_idx, score in chunk_scores[:50]:  # Take top 50 for processing
-            if score < SIMILARITY_THRESHOLD:
+        for chunk_idx, score in top_candidates:
+            chunk = chunk_rows.get(chunk_idx)
+            if chunk is None:
                 continue
-                
-            chunk = index_data["chunks"][chunk_idx]
-            
-            # Filter by department if specified
             if dept and chunk.get("dept") != dept:
                 continue
-                
             filtered_chunks.append((chunk_idx, score, chunk))
         
         # Group by document and take top documents
@@ -483,10 +1096,18 @@ async def search_documents(
         # Sort documents by max score
         sorted_docs = sorted(doc_scores.items(), key=lambda x: x[1]["max_score"], reverse=True)
         
-        # Build results
+        # Build results, fetching titles for just the matched documents
         results = []
-        doc_lookup = {doc["id"]: doc for doc in index_data["docs"]}
-        
+        doc_lookup = {}
+        if doc_scores:
+            placeholders = ",".join("?" * len(doc_scores))
+            cursor = await db.execute(
+                f"SELECT id, title FROM docs WHERE id IN ({placeholders})",
+                list(doc_scores)
+            )
+            doc_lookup = {r["id"]: dict(r) for r in await cursor.fetchall()}
+
+
         for doc_id, doc_data in sorted_docs[:limit]:
             doc_info = doc_lookup.get(doc_id, {})
             best_chunk = max(doc_data["chunks"], key=lambda x: x[1])
@@ -506,33 +1127,24 @@ async def search_documents(
             )
             results.append(result)
         
-        # Build aggregates
-        aggregates = {"byYear": {}, "byDept": {}}
-        
-        for chunk in index_data["chunks"]:
-            # Year aggregation
-            year = chunk.get("year")
-            if year:
-                aggregates["byYear"][str(year)] = aggregates["byYear"].get(str(year), 0) + 1
-            
-            # Department aggregation  
-            dept_name = chunk.get("dept")
-            if dept_name:
-                aggregates["byDept"][dept_name] = aggregates["byDept"].get(dept_name, 0) + 1
+        # Facet aggregates are cached and only recomputed after an ingest
+        aggregates = await get_aggregates(db)
         
         # If no results above threshold, suggest alternatives
         if not results:
             # Could add keyword-based fallback here
             pass
         
-        return SearchResponse(
+        response = SearchResponse(
             query=q,
             results=results,
             aggregates=aggregates,
             total=len(results),
             limit=limit
         )
-        
+        _query_cache_store(query_embedding, dept, limit, response)
+        return response
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 